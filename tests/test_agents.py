@@ -7,41 +7,91 @@ Tests agent behavior, validation, and the specific fix for file analysis queries
 """
 import pytest
 import asyncio
+import hashlib
 import os
 from unittest.mock import patch, Mock # patch è usato per mockare le chiamate a API, Mock è usato per creare oggetti simulati
 
 from agent.llm_validator import LLMQueryValidator, ValidationResult
 from agent.llm_agent import LLMFileAgent
 
+# File binari di test (firma magica nei primi byte), creati una sola volta
+# per sessione dalla fixture binary_corpus
+_BINARY_FILES = {
+    "document.pdf": b'%PDF-1.4\x00\x00\x00binary data',
+    "image.jpg": b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01',
+    "archive.zip": b'PK\x03\x04\x14\x00\x00\x00\x08\x00'
+}
+
+# Contenuto da 1 MiB costruito una sola volta a livello di modulo
+# (test_large_file_handling), con digest precomputato per il confronto
+_LARGE_CONTENT = "A" * (1 << 20)
+_LARGE_CONTENT_DIGEST = hashlib.sha256(_LARGE_CONTENT.encode()).digest()
+
+
+def _build_mock_openai_client():
+    """Build the mocked OpenAI client tree (client → response → tool_calls)."""
+    mock_client = Mock()
+
+    # Mock successful tool call response
+    mock_response = Mock()
+    mock_response.choices = [Mock()]
+    mock_response.choices[0].message.tool_calls = [
+        Mock(
+            function=Mock(
+                name="answer_question_about_files",
+                arguments='{"query": "cosa fa hello.py?"}'
+            )
+        )
+    ]
+    mock_client.chat.completions.create.return_value = mock_response
+    return mock_client
+
+
+# Costruito una sola volta: i test lo condividono e fanno reset_mock()
+# invece di riallocare l'intero albero di Mock a ogni test
+_MOCK_OPENAI_CLIENT = _build_mock_openai_client()
+
+
+async def _validate_all(validator, queries):
+    """Validate independent queries concurrently with asyncio.gather.
+
+    Each validate_query call is a potential LLM network round-trip; running
+    them in parallel collapses N sequential RTTs into roughly one. A
+    semaphore caps concurrency to respect API rate limits.
+    """
+    semaphore = asyncio.Semaphore(5)
+
+    async def validate_one(query):
+        async with semaphore:
+            return await validator.validate_query(query)
+
+    return await asyncio.gather(*(validate_one(q) for q in queries))
+
 
 class TestLLMValidator:
     """Test LLM query validation system."""
     
     @pytest.mark.asyncio
-    async def test_file_analysis_queries_approved(self):
+    async def test_file_analysis_queries_approved(self, validator):
         """Test that file analysis queries are properly approved."""
-        validator = LLMQueryValidator()
-        
         # Test queries that should be approved
         approved_queries = [
             "cosa fa hello.py?",
-            "what does config.json do?", 
+            "what does config.json do?",
             "analyze script.py",
             "read hello.py",
             "list files",
             "what is the largest file?"
         ]
-        
-        for query in approved_queries:
-            is_valid, message, result = await validator.validate_query(query)
+
+        results = await _validate_all(validator, approved_queries)
+        for query, (is_valid, message, result) in zip(approved_queries, results):
             assert is_valid, f"Query '{query}' should be approved but was rejected: {message}"
             assert result == ValidationResult.APPROVED
     
     @pytest.mark.asyncio
-    async def test_inappropriate_queries_rejected(self):
+    async def test_inappropriate_queries_rejected(self, validator):
         """Test that inappropriate queries are properly rejected."""
-        validator = LLMQueryValidator()
-        
         # Test queries that should be rejected
         rejected_queries = [
             "hello how are you?",
@@ -49,16 +99,14 @@ class TestLLMValidator:
             "tell me about politics",
             "help with my relationship"
         ]
-        
-        for query in rejected_queries:
-            is_valid, message, result = await validator.validate_query(query)
+
+        results = await _validate_all(validator, rejected_queries)
+        for query, (is_valid, message, result) in zip(rejected_queries, results):
             assert not is_valid, f"Query '{query}' should be rejected but was approved"
             assert result in [ValidationResult.REJECTED_INAPPROPRIATE, ValidationResult.REJECTED_OFF_TOPIC]
     
-    def test_fallback_validation_file_operations(self):
+    def test_fallback_validation_file_operations(self, validator):
         """Test fallback pattern-based validation for file operations."""
-        validator = LLMQueryValidator()
-        
         # Test specific pattern matching
         test_cases = [
             ("read hello.py", True, "contains file operation keyword"),
@@ -80,30 +128,23 @@ class TestCustomReActAgent:
     
     @pytest.fixture
     def mock_openai_client(self):
-        """Mock OpenAI client for testing without API calls."""
+        """Mock OpenAI client for testing without API calls.
+
+        The Mock tree is built once at module level (_MOCK_OPENAI_CLIENT);
+        here we only patch the constructor and reset call records between
+        tests, instead of re-allocating the whole tree every time. The patch
+        stays function-scoped so tests outside this class keep the real
+        client path.
+        """
         with patch('agent.llm_agent.OpenAI') as mock_openai:
-            mock_client = Mock()
-            mock_openai.return_value = mock_client
-            
-            # Mock successful tool call response
-            mock_response = Mock()
-            mock_response.choices = [Mock()]
-            mock_response.choices[0].message.tool_calls = [
-                Mock(
-                    function=Mock(
-                        name="answer_question_about_files",
-                        arguments='{"query": "cosa fa hello.py?"}'
-                    )
-                )
-            ]
-            mock_client.chat.completions.create.return_value = mock_response
-            
-            yield mock_client
+            mock_openai.return_value = _MOCK_OPENAI_CLIENT
+            yield _MOCK_OPENAI_CLIENT
+        _MOCK_OPENAI_CLIENT.reset_mock()
     
-    def test_should_use_tools_file_queries(self, temp_test_dir):
+    def test_should_use_tools_file_queries(self, fake_react_agent):
         """Test that agent correctly identifies when to use tools."""
-        agent = LLMFileAgent(temp_test_dir, "fake-key")
-        
+        agent = fake_react_agent
+
         # Queries that should use tools
         tool_queries = [
             "cosa fa hello.py?",
@@ -118,10 +159,10 @@ class TestCustomReActAgent:
             should_use = agent._should_use_tools(query, [])
             assert should_use, f"Query '{query}' should use tools but agent says no"
     
-    def test_should_not_use_tools_help_queries(self, temp_test_dir):
+    def test_should_not_use_tools_help_queries(self, fake_react_agent):
         """Test that agent correctly identifies help queries that don't need tools."""
-        agent = LLMFileAgent(temp_test_dir, "fake-key")
-        
+        agent = fake_react_agent
+
         # Queries that should NOT use tools
         no_tool_queries = [
             "help",
@@ -138,45 +179,19 @@ class TestCustomReActAgent:
 class TestIntegrationFileAnalysis:
     """Integration tests for file analysis queries (cosa fa hello.py? fix)."""
     
-    @pytest.fixture
-    def analysis_test_dir(self):
-        """Create test directory with specific files for analysis."""
-        import tempfile
-        import shutil
-        from pathlib import Path
-        
-        temp_dir = tempfile.mkdtemp()
-        
-        # Create test files with specific content
-        test_files = {
-            "hello.py": "def hello_world():\n    print('Hello, World!')\n    return 'success'\n\nif __name__ == '__main__':\n    hello_world()",
-            "config.json": '{"database": {"host": "localhost", "port": 5432}, "debug": true}',
-            "script.py": "#!/usr/bin/env python3\nimport sys\nprint(f'Args: {sys.argv}')",
-            "readme.txt": "This is a sample project for testing file analysis capabilities."
-        }
-        
-        for filename, content in test_files.items():
-            file_path = Path(temp_dir) / filename
-            file_path.write_text(content, encoding='utf-8')
-        
-        yield temp_dir
-        shutil.rmtree(temp_dir)
-    
     @pytest.mark.asyncio
-    async def test_validator_approves_analysis_queries(self, analysis_test_dir):
+    async def test_validator_approves_analysis_queries(self, validator, analysis_test_dir):
         """Test that validator approves file analysis queries."""
-        validator = LLMQueryValidator()
-        
         analysis_queries = [
             "cosa fa hello.py?",
-            "che cosa fa config.json?", 
+            "che cosa fa config.json?",
             "what does script.py do?",
             "analyze readme.txt",
             "what is the purpose of hello.py?"
         ]
-        
-        for query in analysis_queries:
-            is_valid, message, result = await validator.validate_query(query)
+
+        results = await _validate_all(validator, analysis_queries)
+        for query, (is_valid, message, result) in zip(analysis_queries, results):
             assert is_valid, f"Analysis query '{query}' was rejected: {message}"
             assert result == ValidationResult.APPROVED
     
@@ -223,6 +238,55 @@ class TestIntegrationFileAnalysis:
                 pytest.fail("Query was rejected by validator despite fix")
 
 
+@pytest.fixture(scope="session")
+def binary_corpus(tmp_path_factory):
+    """Create the binary test files once per session.
+
+    Path.write_bytes does a single open+write+close via the C path, and the
+    session scope removes the per-test open/write/close triples.
+    """
+    corpus_dir = tmp_path_factory.mktemp("binary_corpus")
+    for filename, content in _BINARY_FILES.items():
+        (corpus_dir / filename).write_bytes(content)
+    return str(corpus_dir)
+
+
+class TestBinaryFileHandling:
+    """End-to-end binary file handling through the Custom ReAct agent."""
+
+    @pytest.mark.asyncio
+    async def test_binary_file_handling_concurrent(self, tmp_path):
+        """Test binary/text reads end-to-end, issuing the queries concurrently.
+
+        The three queries are independent reads, so asyncio.gather collapses
+        three sequential LLM round-trips into one.
+        """
+        openai_key = os.getenv("OPENAI_API_KEY")
+        if not openai_key:
+            pytest.skip("OpenAI API key not available for integration test")
+
+        (tmp_path / "test_binary.pdf").write_bytes(b'%PDF-1.4\x00\x00\x00\x00binary content')
+        (tmp_path / "hello.py").write_text("print('Hello, World!')", encoding='utf-8')
+
+        agent = LLMFileAgent(str(tmp_path), openai_key)
+
+        results = await asyncio.gather(
+            agent.process_query("read test_binary.pdf"),
+            agent.process_query("read hello.py"),
+            agent.process_query("cosa fa test_binary.pdf?"),
+            return_exceptions=True
+        )
+
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                # Accettiamo errori API, ma non fallimenti di validazione
+                assert "outside my scope" not in str(result), \
+                    f"Query #{i} was rejected by the validator"
+            else:
+                assert isinstance(result, dict)
+                assert "message" in result
+
+
 class TestErrorHandling:
     """Test error handling and failure modes."""
     
@@ -254,21 +318,21 @@ class TestErrorHandling:
             # Cleanup: restore permissions
             readonly_dir.chmod(0o755)
     
-    def test_large_file_handling(self, temp_test_dir):
+    def test_large_file_handling(self, fast_tmp_dir):
         """Test handling of large files."""
         from tools.write_file import write_file
         from tools.read_file import read_file
-        
-        # Create a moderately large file (1MB)
-        large_content = "A" * (1024 * 1024)  # 1MB of 'A's
+
         filename = "large_test.txt"
-        
+
         # Should handle large files without issues
-        assert write_file(filename, large_content, temp_test_dir) is True
-        
-        read_content = read_file(filename, temp_test_dir)
-        assert len(read_content) == len(large_content)
-        assert read_content == large_content
+        assert write_file(filename, _LARGE_CONTENT, fast_tmp_dir) is True
+
+        read_content = read_file(filename, fast_tmp_dir)
+        assert len(read_content) == len(_LARGE_CONTENT)
+        # Confronto via digest: evita la scansione O(N) char-per-char di due
+        # stringhe da 1 MiB con identità diversa
+        assert hashlib.sha256(read_content.encode()).digest() == _LARGE_CONTENT_DIGEST
     
     def test_unicode_filename_handling(self, temp_test_dir):
         """Test handling of Unicode filenames."""
@@ -286,27 +350,15 @@ class TestErrorHandling:
             # Some systems may not support Unicode filenames
             pytest.skip(f"Unicode filename not supported on this system: {e}")
     
-    def test_binary_file_error_messages(self, temp_test_dir):
+    @pytest.mark.parametrize("filename", sorted(_BINARY_FILES))
+    def test_binary_file_error_messages(self, binary_corpus, filename):
         """Test that binary files produce clear, helpful error messages."""
         from tools.read_file import read_file
-        from pathlib import Path
-        
-        # Create different types of binary files
-        test_files = {
-            "document.pdf": b'%PDF-1.4\x00\x00\x00binary data',
-            "image.jpg": b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01',
-            "archive.zip": b'PK\x03\x04\x14\x00\x00\x00\x08\x00'
-        }
-        
-        for filename, content in test_files.items():
-            file_path = Path(temp_test_dir) / filename
-            with open(file_path, 'wb') as f:
-                f.write(content)
-            
-            with pytest.raises(ValueError) as exc_info:
-                read_file(filename, temp_test_dir)
-            
-            error_msg = str(exc_info.value)
-            assert filename in error_msg
-            assert "binary file" in error_msg
-            assert "cannot be displayed as text" in error_msg 
\ No newline at end of file
+
+        with pytest.raises(ValueError) as exc_info:
+            read_file(filename, binary_corpus)
+
+        error_msg = str(exc_info.value)
+        assert filename in error_msg
+        assert "binary file" in error_msg
+        assert "cannot be displayed as text" in error_msg 
\ No newline at end of file
@@ -5,12 +5,13 @@ Error handling tests
 Complete coverage of all 5 tools
 """
 import pytest
+import asyncio
 import os
 from pathlib import Path
 
 from tools.list_files import list_files
-from tools.read_file import read_file
-from tools.write_file import write_file
+from tools.read_file import read_file, read_files
+from tools.write_file import write_file, write_file_from
 from tools.delete_file import delete_file
 from tools.answer_question_about_files import answer_question_about_files
 
@@ -99,6 +100,25 @@ class TestReadFile:
         assert "cannot be displayed as text" in error_msg
 
 
+class TestReadFiles:
+    """Test read_files batch tool functionality."""
+
+    def test_read_files_batch(self, temp_test_dir):
+        """Test reading multiple files in one call."""
+        result = read_files(["example.txt", "script.py", "empty.txt"], temp_test_dir)
+
+        assert result == {
+            "example.txt": "Hello World",
+            "script.py": "print('Hello Python')",
+            "empty.txt": "",
+        }
+
+    def test_read_files_error_propagates(self, temp_test_dir):
+        """Test that a missing file in the batch raises."""
+        with pytest.raises(FileNotFoundError):
+            read_files(["example.txt", "nonexistent.txt"], temp_test_dir)
+
+
 class TestWriteFile:
     """Test write_file tool functionality."""
     
@@ -145,6 +165,22 @@ class TestWriteFile:
         with pytest.raises(Exception):
             write_file("../../../tmp/malicious.txt", "bad content", temp_test_dir)
 
+    def test_write_file_from_fd(self, temp_test_dir):
+        """Test the zero-copy write from a source file descriptor."""
+        src_content = "copied through the kernel"
+        write_file("source.txt", src_content, temp_test_dir)
+
+        src_path = os.path.join(temp_test_dir, "source.txt")
+        src_fd = os.open(src_path, os.O_RDONLY)
+        try:
+            result = write_file_from("copy.txt", src_fd,
+                                     len(src_content), temp_test_dir)
+        finally:
+            os.close(src_fd)
+
+        assert result is True
+        assert read_file("copy.txt", temp_test_dir) == src_content
+
 
 class TestDeleteFile:
     """Test delete_file tool functionality."""
@@ -217,18 +253,24 @@ class TestAnswerQuestionAboutFiles:
 class TestToolIntegration:
     """Test tool integration and edge cases."""
     
-    def test_full_crud_cycle(self, temp_test_dir):
+    async def test_full_crud_cycle(self, temp_test_dir):
         """Test complete CRUD cycle: Create, Read, Update, Delete."""
         filename = "crud_test.txt"
         content = "Initial content"
-        
+
         # CREATE
         assert write_file(filename, content, temp_test_dir) is True
-        
-        # READ
-        read_content = read_file(filename, temp_test_dir)
+
+        # READ + LIST in parallelo: i tool restano sincroni (registry e MCP
+        # server li invocano direttamente), quindi la concorrenza I/O-bound
+        # sta nel chiamante via to_thread + gather
+        read_content, file_list = await asyncio.gather(
+            asyncio.to_thread(read_file, filename, temp_test_dir),
+            asyncio.to_thread(list_files, temp_test_dir)
+        )
         assert read_content == content
-        
+        assert filename in [f['name'] for f in file_list]
+
         # UPDATE (append)
         assert write_file(filename, " - Updated", temp_test_dir, mode="a") is True
         updated_content = read_file(filename, temp_test_dir)
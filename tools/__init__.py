@@ -3,16 +3,20 @@ Package tools per operazioni CRUD sui file.
 Tutti i tool operano solo all'interno di una directory base specificata.
 """
 
-from .list_files import list_files
-from .read_file import read_file
-from .write_file import write_file
+from .list_files import list_files, list_files_iter
+from .read_file import read_file, read_files
+from .write_file import write_file, write_file_from
 from .delete_file import delete_file
-from .answer_question_about_files import answer_question_about_files
+from .answer_question_about_files import answer_question_about_files, clear_cache
 
 __all__ = [
     'list_files',
-    'read_file', 
+    'list_files_iter',
+    'read_file',
+    'read_files',
     'write_file',
+    'write_file_from',
     'delete_file',
-    'answer_question_about_files'
+    'answer_question_about_files',
+    'clear_cache'
 ] 
\ No newline at end of file
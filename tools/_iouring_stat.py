@@ -0,0 +1,96 @@
+"""
+Fast-path opzionale per raccogliere metadati in batch via io_uring statx.
+Richiede il binding `liburing` (non è una dipendenza del progetto) e va
+abilitato esplicitamente con FILE_AGENT_IOURING=1; in tutti gli altri casi
+i chiamanti usano il percorso os.scandir standard.
+"""
+import os
+import sys
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Numero massimo di SQE sottomesse in un singolo batch
+_BATCH_SIZE = 16384
+
+_liburing = None
+_probe_done = False
+
+
+def _load_liburing():
+    """Importa liburing una sola volta (lazy); None se non disponibile."""
+    global _liburing, _probe_done
+    if not _probe_done:
+        _probe_done = True
+        try:
+            import liburing  # type: ignore
+            _liburing = liburing
+        except ImportError:
+            _liburing = None
+    return _liburing
+
+
+def enabled() -> bool:
+    """True se il fast-path io_uring è attivabile su questa macchina."""
+    return (
+        sys.platform == 'linux'
+        and os.environ.get('FILE_AGENT_IOURING') == '1'
+        and _load_liburing() is not None
+    )
+
+
+def batch_statx(base_directory: str, names):
+    """
+    Esegue statx in batch per `names` relativi a `base_directory`.
+
+    Args:
+        base_directory: Directory contenente i file
+        names: Nomi dei file da statare
+
+    Returns:
+        Dict nome -> (size, mtime) per i file risolti con successo;
+        None se il batch non è andato a buon fine (il chiamante fa fallback)
+    """
+    liburing = _load_liburing()
+    if liburing is None:
+        return None
+
+    results = {}
+    try:
+        ring = liburing.io_uring()
+        liburing.io_uring_queue_init(min(_BATCH_SIZE, len(names)), ring, 0)
+        try:
+            for chunk_start in range(0, len(names), _BATCH_SIZE):
+                chunk = names[chunk_start:chunk_start + _BATCH_SIZE]
+                statx_bufs = []
+                # I bytes dei path vanno tenuti vivi fino alla submit: il
+                # kernel li legge al momento della io_uring_submit_and_wait
+                path_bufs = []
+                for i, name in enumerate(chunk):
+                    sqe = liburing.io_uring_get_sqe(ring)
+                    path = os.path.join(base_directory, name).encode()
+                    path_bufs.append(path)
+                    buf = liburing.statx()
+                    statx_bufs.append(buf)
+                    liburing.io_uring_prep_statx(sqe, -1, path, 0, 0, buf)
+                    # user_data ricollega la CQE alla richiesta: le
+                    # completion arrivano in ordine arbitrario
+                    sqe.user_data = i
+                liburing.io_uring_submit_and_wait(ring, len(chunk))
+
+                cqe = liburing.io_uring_cqe()
+                for _ in chunk:
+                    liburing.io_uring_wait_cqe(ring, cqe)
+                    i = cqe.user_data
+                    if cqe.res == 0:
+                        buf = statx_bufs[i]
+                        results[chunk[i]] = (buf.stx_size, buf.stx_mtime.tv_sec)
+                    liburing.io_uring_cqe_seen(ring, cqe)
+                del path_bufs
+        finally:
+            liburing.io_uring_queue_exit(ring)
+    except Exception as e:
+        logger.debug(f"io_uring statx batch failed, falling back to scandir: {e}")
+        return None
+
+    return results
@@ -0,0 +1,41 @@
+"""
+Helper condivisi per risolvere i percorsi e verificare il contenimento
+nella directory base. La base viene risolta una sola volta per processo:
+Path.resolve() costa una realpath() per componente e i tool vengono
+invocati in loop stretti sugli stessi percorsi.
+"""
+import functools
+import os
+from pathlib import Path
+
+
+@functools.lru_cache(maxsize=128)
+def resolve_base(base_directory: str) -> str:
+    """Risolve la directory base con separatore finale, cache per-processo.
+
+    Il separatore finale rende il controllo startswith non ambiguo
+    (/base vs /base-altro).
+    """
+    return str(Path(base_directory).resolve()) + os.sep
+
+
+def ensure_within_base(filename: str, base_directory: str) -> str:
+    """
+    Risolve filename dentro base_directory e verifica che non esca dalla base.
+
+    Args:
+        filename: Nome (o percorso relativo) del file
+        base_directory: Percorso alla directory base di lavoro
+
+    Returns:
+        Percorso assoluto risolto del file
+
+    Raises:
+        ValueError: Se il percorso risolto è fuori dalla directory base
+    """
+    base = resolve_base(base_directory)
+    # realpath solo sul figlio: la base è già risolta dalla cache
+    target = os.path.realpath(os.path.join(base, filename))
+    if not (target + os.sep).startswith(base):
+        raise ValueError(f"File {filename} is not within the base directory")
+    return target
@@ -4,18 +4,131 @@ Analizza contenuti e metadati per fornire risposte contestuali e sintesi.
 """
 from pathlib import Path
 from typing import List, Dict, Any, Optional
+import os
 import re
+import time
 import logging
 import json
+import threading
 import openai
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Cache LRU con TTL degli scan di directory: path -> (dir_mtime, insert_time,
+# files_data). Evita di rileggere tutti i file per query ripetute sulla
+# stessa directory; invalidata da mtime della directory o scadenza TTL.
+_scan_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_SCAN_CACHE_TTL = 30.0  # secondi
+_SCAN_CACHE_MAX_ENTRIES = 64
+
+# Byte letti per la preview e dimensione dei chunk per i conteggi streaming
+_PREVIEW_BYTES = 4096
+_COUNT_CHUNK_BYTES = 65536
+
+# Budget globale di byte di anteprima per scan: limita sia la RAM sia i
+# token inviati a GPT su directory con migliaia di file. I file più grandi
+# hanno priorità; gli altri restano a soli metadati.
+TOTAL_PREVIEW_BUDGET = 32_768
+
+# Sotto questa soglia l'overhead del thread pool supera il guadagno
+_PARALLEL_READ_MIN_FILES = 8
+
+# Estensioni considerate testo leggibile: frozenset a livello di modulo,
+# costruito (e internato) una volta sola invece che a ogni chiamata
+READABLE_EXTS = frozenset({
+    '.txt', '.py', '.js', '.json', '.md', '.csv', '.xml', '.yaml', '.yml',
+    '.ini', '.cfg', '.log', '.sql', '.html', '.css', '.env'
+})
+
+# File sotto questa dimensione vengono analizzati anche senza estensione nota
+SMALL_FILE_BYTES = 1 << 20  # 1 MB
+
+# Byte considerati "testo" per lo sniff binario (stessa euristica di file(1)):
+# tab/newline/CR/FF/BEL/BS/ESC più tutto il range stampabile e >=0x80
+_SNIFF_BYTES = 512
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+
+# Buffer di lettura riusato per-thread: evita un'allocazione bytes per ogni
+# chunk letto (decine di migliaia su scan grandi), thread-safe con il pool
+_read_buffers = threading.local()
+
+# Token "parola" con la stessa semantica di bytes.split() senza argomenti
+_WORD_RE = re.compile(rb'[^ \t\n\r\x0b\x0c]+')
+_WHITESPACE = frozenset(b' \t\n\r\x0b\x0c')
+
+# Token identificatore per l'indice invertito dei contenuti
+_TOKEN_RE = re.compile(rb'[A-Za-z_][A-Za-z0-9_]{2,31}')
+
+# Parole della query da ignorare quando si cerca il termine da cercare
+_QUERY_STOPWORDS = frozenset({
+    'which', 'what', 'files', 'file', 'contain', 'contains', 'containing',
+    'the', 'word', 'does', 'have', 'has', 'with', 'any', 'quali', 'file',
+    'contengono', 'contiene', 'parola'
+})
+
+
+def _get_read_buf() -> bytearray:
+    """Restituisce il buffer di chunk riusabile del thread corrente."""
+    buf = getattr(_read_buffers, 'buf', None)
+    if buf is None:
+        buf = _read_buffers.buf = bytearray(_COUNT_CHUNK_BYTES)
+    return buf
+
+
+def _looks_binary(head: bytes) -> bool:
+    """True se i primi byte indicano contenuto binario (NUL o >30% non-testo).
+
+    translate() elimina i byte di testo in un loop C: quello che resta è
+    la quota non-testo, senza iterare byte per byte in Python.
+    """
+    sniff = head[:_SNIFF_BYTES]
+    if not sniff:
+        return False
+    if b'\x00' in sniff:
+        return True
+    return len(sniff.translate(None, _TEXT_BYTES)) > len(sniff) * 0.3
+
+
+def _fmt_mtime(ts: float) -> str:
+    """Formatta un mtime come 'YYYY-MM-DD HH:MM:SS'.
+
+    Equivalente a datetime.fromtimestamp(ts).strftime(...) ma senza
+    istanziare datetime né passare dalla macchina locale di strftime:
+    su scan di migliaia di file il risparmio si vede nei profili.
+    """
+    tm = time.localtime(ts)
+    return (f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d} "
+            f"{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}")
+
+
+def clear_cache():
+    """Svuota la cache degli scan di directory (utile nei test)."""
+    _scan_cache.clear()
+
 # Configurazione OpenAI (sarà impostata dall'agente)
 openai_client = None
 _current_api_key = None
 
+# Prompt di sistema costante e identico a ogni chiamata: come prefisso
+# stabile è eleggibile per il prompt caching lato OpenAI
+SYSTEM_PROMPT = """You are an expert assistant for file and directory analysis.
+Analyze the provided file data and respond to user questions intelligently and in detail.
+
+You can:
+- Summarize file contents
+- Identify patterns and relationships
+- Provide detailed statistics
+- Analyze code and structures
+- Make data inferences
+- Suggest improvements
+
+Always respond in English, be precise and provide concrete examples when possible."""
+
 def set_openai_client(api_key: str):
     """Configura il client OpenAI con la API key."""
     global openai_client, _current_api_key
@@ -56,10 +169,18 @@ def answer_question_about_files(base_directory: str, query: str, api_key: Option
         
         # STEP 2: Analisi intelligente
         if api_key:
+            # Pre-filtro: per gli intenti puramente numerici (es. "how many")
+            # la risposta basic è già esatta, inutile pagare una chiamata GPT
+            matches = _INTENT_RE.findall(query.lower())
+            if matches:
+                intent = min(matches, key=_INTENT_PRIORITY.__getitem__)
+                if _INTENT_HANDLERS[intent] is _handle_count:
+                    return _get_basic_analysis(files_data, query)
+
             # Setup OpenAI client se necessario
             if api_key != _current_api_key:
                 set_openai_client(api_key)
-            
+
             # Analisi avanzata con GPT
             return _get_gpt_analysis(files_data, query)
         else:
@@ -81,80 +202,218 @@ def _collect_comprehensive_file_data(base_path: Path) -> Dict[str, Any]:
     Returns:
         Dict con tutti i dati sui file
     """
+    cache_key = str(base_path)
+    try:
+        dir_mtime = base_path.stat().st_mtime
+    except OSError:
+        dir_mtime = None
+
+    # Cache hit: stessa directory, mtime invariato e TTL non scaduto.
+    # I chiamanti non mutano files_data, quindi niente deep-copy.
+    if dir_mtime is not None:
+        cached = _scan_cache.get(cache_key)
+        if cached and cached[0] == dir_mtime and time.monotonic() - cached[1] < _SCAN_CACHE_TTL:
+            _scan_cache.move_to_end(cache_key)
+            return cached[2]
+
     files_data = {
         "directory": str(base_path),
         "scan_time": datetime.now().isoformat(),
         "files": [],
+        # Colonne SoA parallele a "files": le statistiche (max/min/somme)
+        # toccano solo questi campi e con gli array compatti evitano una
+        # lookup di dict per ogni accesso
+        "_names": [],
+        "_sizes": array('q'),
+        "_mtimes": array('d'),
+        # Indice invertito token -> indici file, costruito dai byte di
+        # anteprima già in RAM; condivide la cache (e l'invalidazione
+        # su mtime/TTL) dell'intero scan
+        "_index": {},
         "summary": {
             "total_files": 0,
             "total_size": 0,
             "file_types": {},
-            "readable_files": 0
+            "readable_files": 0,
+            "preview_skipped": 0
         }
     }
     
     try:
-        all_files = list(base_path.iterdir())
-        files_data["summary"]["total_files"] = len([f for f in all_files if f.is_file()])
-        
-        for file_path in all_files:
-            if file_path.is_file():
-                file_info = _analyze_single_file(file_path)
-                files_data["files"].append(file_info)
-                
-                # Aggiorna summary
-                files_data["summary"]["total_size"] += file_info["size"]
-                ext = file_info["extension"] or "no_extension"
-                files_data["summary"]["file_types"][ext] = files_data["summary"]["file_types"].get(ext, 0) + 1
-                
-                if file_info["content"]:
-                    files_data["summary"]["readable_files"] += 1
+        # Enumerazione via os.scandir: i metadati arrivano da readdir senza
+        # una stat separata per entry né l'allocazione di un Path ciascuna
+        with os.scandir(base_path) as it:
+            entries = [e for e in it if e.is_file(follow_symlinks=False)]
+
+        files_data["summary"]["total_files"] = len(entries)
+
+        # Distribuisce il budget globale di anteprima per rango di dimensione:
+        # i file più grandi (più informativi per GPT) prendono fino a
+        # _PREVIEW_BYTES ciascuno finché il budget non è esaurito, gli altri
+        # restano a soli metadati
+        budgets = {id(e): 0 for e in entries}
+        remaining = TOTAL_PREVIEW_BUDGET
+        for entry in sorted(entries, key=lambda e: e.stat(follow_symlinks=False).st_size,
+                            reverse=True):
+            if remaining <= 0:
+                break
+            # Il budget conta byte letti davvero: un file piccolo consuma
+            # solo la sua dimensione, non l'intera quota da _PREVIEW_BYTES
+            # (minimo 1 byte, così anche i file vuoti vengono analizzati)
+            size = entry.stat(follow_symlinks=False).st_size
+            grant = min(remaining, _PREVIEW_BYTES, max(size, 1))
+            budgets[id(entry)] = grant
+            remaining -= grant
+        files_data["summary"]["preview_skipped"] = sum(1 for b in budgets.values() if b == 0)
+
+        # Le letture rilasciano il GIL: su directory con molti file un thread
+        # pool dà speedup quasi lineare, limitato dal disco/page cache
+        # Le DirEntry passano così come sono: niente conversione in Path e
+        # lo stat arriva dalla cache della entry popolata dal giro dei budget
+        if len(entries) >= _PARALLEL_READ_MIN_FILES:
+            max_workers = min(32, (os.cpu_count() or 1) * 4)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                file_infos = list(executor.map(
+                    lambda e: _analyze_single_file(e, budgets[id(e)]),
+                    entries
+                ))
+        else:
+            file_infos = [_analyze_single_file(e, budgets[id(e)])
+                          for e in entries]
+
+        # Ordine deterministico indipendente dalla schedulazione dei thread
+        file_infos.sort(key=lambda fi: fi["name"])
+
+        # Istogramma dei tipi con id interi: una sola lookup hash per file
+        # (setdefault) e incrementi su una lista compatta invece di
+        # get + riassegnazione su dict per ogni entry
+        ext_id: Dict[str, int] = {}
+        counts: List[int] = []
+        index = files_data["_index"]
+        for file_idx, file_info in enumerate(file_infos):
+            for token in file_info.pop("_tokens", ()):
+                index.setdefault(token, []).append(file_idx)
+            files_data["files"].append(file_info)
+            files_data["_names"].append(file_info["name"])
+            files_data["_sizes"].append(file_info["size"])
+            files_data["_mtimes"].append(file_info["modified"])
+
+            # Aggiorna summary
+            files_data["summary"]["total_size"] += file_info["size"]
+            ext = file_info["extension"] or "no_extension"
+            i = ext_id.setdefault(ext, len(ext_id))
+            if i == len(counts):
+                counts.append(0)
+            counts[i] += 1
+
+            if file_info["content_preview"]:
+                files_data["summary"]["readable_files"] += 1
+
+        # Serializzazione in {ext: count} solo una volta, a fine scan
+        files_data["summary"]["file_types"] = {ext: counts[i] for ext, i in ext_id.items()}
     
     except Exception as e:
         logger.error(f"Error collecting file data: {e}")
-    
+
+    if dir_mtime is not None:
+        _scan_cache[cache_key] = (dir_mtime, time.monotonic(), files_data)
+        _scan_cache.move_to_end(cache_key)
+        # Eviction LRU oltre il limite
+        while len(_scan_cache) > _SCAN_CACHE_MAX_ENTRIES:
+            _scan_cache.popitem(last=False)
+
     return files_data
 
-def _analyze_single_file(file_path: Path) -> Dict[str, Any]:
+def _analyze_single_file(entry, preview_budget: int = _PREVIEW_BYTES) -> Dict[str, Any]:
     """
     Analizza un singolo file raccogliendo metadati e contenuto.
-    
+
     Args:
-        file_path: Path del file da analizzare
-        
+        entry: os.DirEntry del file da analizzare (o qualunque oggetto
+               equivalente con attributi name, path e metodo stat())
+        preview_budget: Byte di anteprima concessi a questo file
+                        (0 = solo metadati, nessuna lettura)
+
     Returns:
         Dict con informazioni complete sul file
     """
-    stat = file_path.stat()
-    
+    # DirEntry: name/path sono attributi già pronti e stat() è in cache su
+    # Linux — nessuna property pathlib né syscall aggiuntiva per campo
+    stat = entry.stat(follow_symlinks=False)
+    name = entry.name
+    # rpartition sulla stringa: estrazione dell'estensione senza l'overhead
+    # del descriptor Path.suffix
+    _, dot, ext = name.rpartition('.')
+    ext = ('.' + ext).lower() if dot else ''
+
     file_info = {
-        "name": file_path.name,
+        "name": name,
         "size": stat.st_size,
         "size_formatted": _format_file_size(stat.st_size),
         "modified": stat.st_mtime,
-        "modified_formatted": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
-        "extension": file_path.suffix.lower(),
+        "modified_formatted": _fmt_mtime(stat.st_mtime),
+        "extension": ext,
         "content": None,
         "content_preview": None,
         "is_readable": False
     }
-    
-    # Prova a leggere il contenuto se è un file di testo
-    readable_extensions = {'.txt', '.py', '.js', '.json', '.md', '.csv', '.xml', '.yaml', '.yml', 
-                          '.ini', '.cfg', '.log', '.sql', '.html', '.css', '.env'}
-    
-    if file_info["extension"] in readable_extensions or file_info["size"] < 1024 * 1024:  # < 1MB
+
+    # Prova a leggere il contenuto se è un file di testo e c'è budget residuo
+    if preview_budget > 0 and (ext in READABLE_EXTS or stat.st_size < SMALL_FILE_BYTES):
         try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            file_info["content"] = content
-            file_info["content_preview"] = content[:500] + "..." if len(content) > 500 else content
-            file_info["is_readable"] = True
-            file_info["lines_count"] = len(content.splitlines())
-            file_info["words_count"] = len(content.split())
+            # Lettura in streaming nel buffer riusato del thread: readinto
+            # riempie sempre lo stesso bytearray, zero allocazioni per chunk
+            buf = _get_read_buf()
+            mv = memoryview(buf)
+            with open(entry.path, 'rb') as f:
+                head_len = f.readinto(mv[:min(preview_budget, _PREVIEW_BYTES)]) or 0
+                head = bytes(mv[:head_len])
+                # Sniff binario prima del decode: per i file binari evita
+                # sia il decode spazzatura sia la lettura del resto
+                if _looks_binary(head):
+                    return file_info
+                preview_text = head.decode('utf-8', errors='ignore')
+                if len(preview_text) > 500:
+                    file_info["content_preview"] = preview_text[:500] + "..."
+                else:
+                    file_info["content_preview"] = preview_text
+                file_info["is_readable"] = True
+                # Token per l'indice invertito, estratti dai byte già letti
+                file_info["_tokens"] = {
+                    t.decode('ascii').lower() for t in _TOKEN_RE.findall(head)
+                }
+
+                # Conteggio righe/parole in passata streaming: bytes.count è
+                # un loop C, le parole sono gestite con riporto ai bordi chunk
+                lines = 0
+                words = 0
+                prev_ends_nonspace = False
+                ends_with_newline = False
+                read_any = False
+                n = head_len
+                while n:
+                    read_any = True
+                    lines += buf.count(b'\n', 0, n)
+                    # finditer sulla memoryview: conta i token senza
+                    # materializzare la lista di parole come farebbe split()
+                    chunk_words = sum(1 for _ in _WORD_RE.finditer(mv, 0, n))
+                    words += chunk_words
+                    # Una parola spezzata tra due chunk era contata due volte
+                    if chunk_words and prev_ends_nonspace and buf[0] not in _WHITESPACE:
+                        words -= 1
+                    prev_ends_nonspace = buf[n - 1] not in _WHITESPACE
+                    ends_with_newline = buf[n - 1] == 0x0A
+                    n = f.readinto(mv) or 0
+
+                # splitlines conta anche un'ultima riga senza newline finale
+                if read_any and not ends_with_newline:
+                    lines += 1
+                file_info["lines_count"] = lines
+                file_info["words_count"] = words
         except Exception:
-            file_info["content"] = None
+            file_info["content_preview"] = None
             file_info["is_readable"] = False
-    
+
     return file_info
 
 def _get_gpt_analysis(files_data: Dict[str, Any], query: str) -> str:
@@ -171,19 +430,6 @@ def _get_gpt_analysis(files_data: Dict[str, Any], query: str) -> str:
     try:
         # Prepara il context per GPT
         context = _prepare_gpt_context(files_data)
-        
-        system_prompt = """You are an expert assistant for file and directory analysis.
-Analyze the provided file data and respond to user questions intelligently and in detail.
-
-You can:
-- Summarize file contents
-- Identify patterns and relationships
-- Provide detailed statistics
-- Analyze code and structures
-- Make data inferences
-- Suggest improvements
-
-Always respond in English, be precise and provide concrete examples when possible."""
 
         user_prompt = f"""File data in directory:
 {context}
@@ -192,17 +438,25 @@ User question: {query}
 
 Analyze the data and provide a complete and useful response."""
 
+        # stream=True: i token arrivano appena generati invece di attendere
+        # l'intera risposta (TTFT invece di TTFT + generazione completa)
         response = openai_client.chat.completions.create(
             model="gpt-4o",
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ],
             max_tokens=2000,
-            temperature=0.3
+            temperature=0.3,
+            stream=True
         )
-        
-        return response.choices[0].message.content.strip()
+
+        parts = []
+        for chunk in response:
+            if chunk.choices:
+                parts.append(chunk.choices[0].delta.content or '')
+
+        return ''.join(parts).strip()
         
     except Exception as e:
         logger.error(f"Error in GPT analysis: {e}")
@@ -218,37 +472,41 @@ def _prepare_gpt_context(files_data: Dict[str, Any]) -> str:
     Returns:
         Context formattato per GPT
     """
-    context_parts = []
-    
-    # Summary generale
+    files = files_data["files"]
     summary = files_data["summary"]
-    context_parts.append(f"""RIEPILOGO DIRECTORY:
+
+    # Lista pre-dimensionata e riempita per indice: niente riallocazioni
+    # da append né concatenazioni += di stringhe nel loop per-file
+    context_parts = [None] * (len(files) + 2)
+    context_parts[0] = f"""RIEPILOGO DIRECTORY:
 - Percorso: {files_data['directory']}
 - File totali: {summary['total_files']}
 - Dimensione totale: {_format_file_size(summary['total_size'])}
 - File leggibili: {summary['readable_files']}
 - Tipi di file: {', '.join([f'{count} {ext}' for ext, count in summary['file_types'].items()])}
-""")
-    
-    # Dettagli sui file
-    context_parts.append("\nDETTAGLI FILE:")
-    
-    for file_info in files_data["files"]:
-        file_detail = f"""
-📄 {file_info['name']}
-   - Dimensione: {file_info['size_formatted']}
-   - Modificato: {file_info['modified_formatted']}
-   - Tipo: {file_info['extension'] or 'nessuna estensione'}"""
-        
-        if file_info["is_readable"] and file_info["content"]:
-            file_detail += f"""
-   - Righe: {file_info.get('lines_count', 'N/A')}
-   - Parole: {file_info.get('words_count', 'N/A')}
-   - Anteprima contenuto:
-     {file_info['content_preview']}"""
-        
-        context_parts.append(file_detail)
-    
+"""
+    context_parts[1] = "\nDETTAGLI FILE:"
+
+    for idx, file_info in enumerate(files, start=2):
+        # Singola f-string con coda condizionale: una sola allocazione
+        # per file invece di costruire il dettaglio con +=
+        context_parts[idx] = (
+            f"\n📄 {file_info['name']}"
+            f"\n   - Dimensione: {file_info['size_formatted']}"
+            f"\n   - Modificato: {file_info['modified_formatted']}"
+            f"\n   - Tipo: {file_info['extension'] or 'nessuna estensione'}"
+            + (
+                f"\n   - Righe: {file_info.get('lines_count', 'N/A')}"
+                f"\n   - Parole: {file_info.get('words_count', 'N/A')}"
+                f"\n   - Anteprima contenuto:\n     {file_info['content_preview']}"
+                if file_info["is_readable"] and file_info["content_preview"] else ""
+            )
+        )
+
+    skipped = summary.get("preview_skipped", 0)
+    if skipped:
+        context_parts.append(f"\n... {skipped} more files (metadata only, preview budget exhausted)")
+
     return "\n".join(context_parts)
 
 def _get_basic_analysis(files_data: Dict[str, Any], query: str) -> str:
@@ -266,76 +524,133 @@ def _get_basic_analysis(files_data: Dict[str, Any], query: str) -> str:
         summary = files_data["summary"]
         files = files_data["files"]
         query_lower = query.lower()
-        
-        # Analisi per tipo di domanda
-        if "how many" in query_lower or "count" in query_lower:
-            return f"I found {summary['total_files']} files in the directory."
-        
-        elif "largest" in query_lower or "biggest" in query_lower:
-            if files:
-                largest = max(files, key=lambda f: f["size"])
-                return f"The largest file is '{largest['name']}' ({largest['size_formatted']})."
-            return "No files found."
-        
-        elif "smallest" in query_lower:
-            if files:
-                smallest = min(files, key=lambda f: f["size"])
-                return f"The smallest file is '{smallest['name']}' ({smallest['size_formatted']})."
-            return "No files found."
-        
-        elif "types" in query_lower or "extensions" in query_lower:
-            types = summary.get("file_types", {})
-            if types:
-                type_list = [f"{count} {ext} files" for ext, count in types.items()]
-                return f"File types found: {', '.join(type_list)}."
-            return "No specific file types identified."
-        
-        elif "recent" in query_lower or "newest" in query_lower:
-            if files:
-                most_recent = max(files, key=lambda f: f["modified"])
-                return f"The most recent file is '{most_recent['name']}' (modified: {most_recent['modified_formatted']})."
-            return "No files found."
-        
-        elif "cosa fa" in query_lower or "what does" in query_lower:
-            # Trova il nome del file nella query
-            for file_info in files:
-                if file_info["name"].lower() in query_lower:
-                    if file_info["is_readable"] and file_info["content"]:
-                        return f"File '{file_info['name']}' contains:\n{file_info['content_preview']}"
-                    else:
-                        return f"File '{file_info['name']}' is a {file_info['extension']} file ({file_info['size_formatted']}) but content cannot be analyzed without AI."
-            return "File not found or content cannot be analyzed without AI."
-        
-        else:
-            # Risposta generica informativa
-            readable_count = sum(1 for f in files if f["is_readable"])
-            return f"""Directory analysis summary:
+
+        # Dispatch in un'unica scansione: trova tutte le keyword presenti e
+        # sceglie quella a priorità più alta (stesso ordine della vecchia
+        # cascata di if/elif)
+        matches = _INTENT_RE.findall(query_lower)
+        if matches:
+            intent = min(matches, key=_INTENT_PRIORITY.__getitem__)
+            return _INTENT_HANDLERS[intent](files_data, query_lower)
+
+        # Risposta generica informativa
+        readable_count = sum(1 for f in files if f["is_readable"])
+        return f"""Directory analysis summary:
 - Total files: {summary['total_files']}
 - Total size: {_format_file_size(summary['total_size'])}
 - Readable files: {readable_count}
 - File types: {', '.join(summary.get('file_types', {}).keys())}
 
 For detailed analysis of file contents and patterns, OpenAI API integration is required."""
-    
+
     except Exception as e:
         logger.error(f"Error in basic analysis: {e}")
         return f"❌ Error in basic analysis: {str(e)}"
 
+
+def _handle_count(files_data, query_lower) -> str:
+    return f"I found {files_data['summary']['total_files']} files in the directory."
+
+
+def _handle_largest(files_data, query_lower) -> str:
+    sizes = files_data["_sizes"]
+    if len(sizes):
+        # argmax sulla colonna compatta invece di max() con lambda sui dict
+        i = max(range(len(sizes)), key=sizes.__getitem__)
+        largest = files_data["files"][i]
+        return f"The largest file is '{largest['name']}' ({largest['size_formatted']})."
+    return "No files found."
+
+
+def _handle_smallest(files_data, query_lower) -> str:
+    sizes = files_data["_sizes"]
+    if len(sizes):
+        i = min(range(len(sizes)), key=sizes.__getitem__)
+        smallest = files_data["files"][i]
+        return f"The smallest file is '{smallest['name']}' ({smallest['size_formatted']})."
+    return "No files found."
+
+
+def _handle_types(files_data, query_lower) -> str:
+    types = files_data["summary"].get("file_types", {})
+    if types:
+        type_list = [f"{count} {ext} files" for ext, count in types.items()]
+        return f"File types found: {', '.join(type_list)}."
+    return "No specific file types identified."
+
+
+def _handle_recent(files_data, query_lower) -> str:
+    mtimes = files_data["_mtimes"]
+    if len(mtimes):
+        i = max(range(len(mtimes)), key=mtimes.__getitem__)
+        most_recent = files_data["files"][i]
+        return f"The most recent file is '{most_recent['name']}' (modified: {most_recent['modified_formatted']})."
+    return "No files found."
+
+
+def _handle_contains(files_data, query_lower) -> str:
+    # Lookup O(1) sull'indice invertito invece di riscandire i contenuti
+    index = files_data.get("_index", {})
+    terms = [t for t in re.findall(r'[A-Za-z_][A-Za-z0-9_]{2,31}', query_lower)
+             if t not in _QUERY_STOPWORDS]
+    hits = set()
+    matched_terms = []
+    for term in terms:
+        indices = index.get(term)
+        if indices:
+            hits.update(indices)
+            matched_terms.append(term)
+    if hits:
+        names = sorted(files_data["files"][i]["name"] for i in hits)
+        return (f"Files containing '{', '.join(matched_terms)}': "
+                f"{', '.join(names)}.")
+    if terms:
+        return f"No files contain '{', '.join(terms)}'."
+    return "Please specify which word to search for."
+
+
+def _handle_what_does(files_data, query_lower) -> str:
+    # Trova il nome del file nella query
+    for file_info in files_data["files"]:
+        if file_info["name"].lower() in query_lower:
+            if file_info["is_readable"] and file_info["content_preview"]:
+                return f"File '{file_info['name']}' contains:\n{file_info['content_preview']}"
+            else:
+                return f"File '{file_info['name']}' is a {file_info['extension']} file ({file_info['size_formatted']}) but content cannot be analyzed without AI."
+    return "File not found or content cannot be analyzed without AI."
+
+
+# Keyword -> handler, in ordine di priorità (stessa della vecchia cascata);
+# la regex compilata fa una sola passata sulla query
+_INTENT_HANDLERS = {
+    "how many": _handle_count, "count": _handle_count,
+    "largest": _handle_largest, "biggest": _handle_largest,
+    "smallest": _handle_smallest,
+    "types": _handle_types, "extensions": _handle_types,
+    "recent": _handle_recent, "newest": _handle_recent,
+    "cosa fa": _handle_what_does, "what does": _handle_what_does,
+    "contain": _handle_contains, "contengono": _handle_contains,
+}
+_INTENT_PRIORITY = {kw: i for i, kw in enumerate(_INTENT_HANDLERS)}
+_INTENT_RE = re.compile("|".join(map(re.escape, _INTENT_HANDLERS)))
+
+# Tabella (divisore, suffisso) indicizzata per decade binaria: l'indice
+# arriva da bit_length() senza catena di confronti
+_SIZE_UNITS = ((1, 'bytes'), (1024, 'KB'), (1 << 20, 'MB'), (1 << 30, 'GB'))
+
+
 def _format_file_size(size_bytes: int) -> str:
     """
     Formatta la dimensione del file in formato human-readable.
-    
+
     Args:
         size_bytes: Dimensione in bytes
-        
+
     Returns:
         Stringa formattata (es. "1.2 KB", "3.4 MB")
     """
-    if size_bytes < 1024:
+    idx = min(max(0, (size_bytes.bit_length() - 1) // 10), len(_SIZE_UNITS) - 1)
+    if idx == 0:
         return f"{size_bytes} bytes"
-    elif size_bytes < 1024 * 1024:
-        return f"{size_bytes / 1024:.1f} KB"
-    elif size_bytes < 1024 * 1024 * 1024:
-        return f"{size_bytes / (1024 * 1024):.1f} MB"
-    else:
-        return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
\ No newline at end of file
+    div, unit = _SIZE_UNITS[idx]
+    return f"{size_bytes / div:.1f} {unit}"
\ No newline at end of file
@@ -4,6 +4,8 @@ Opera solo all'interno della directory base specificata.
 """
 from pathlib import Path
 
+from ._paths import ensure_within_base
+
 
 def delete_file(filename: str, base_directory: str) -> bool:
     """
@@ -23,14 +25,10 @@ def delete_file(filename: str, base_directory: str) -> bool:
         OSError: Se si verifica un errore di I/O
     """
     try:
-        base_path = Path(base_directory)
-        file_path = base_path / filename
-        
-        # Verifica che il file sia all'interno della directory base
-        try:
-            file_path.resolve().relative_to(base_path.resolve())
-        except ValueError:
-            raise ValueError(f"File {filename} is not within the base directory")
+        # Verifica che il file sia all'interno della directory base:
+        # stesso helper condiviso (base in cache + confronto di prefissi)
+        # usato da read_file e write_file
+        file_path = Path(ensure_within_base(filename, base_directory))
             
         if not file_path.exists():
             raise FileNotFoundError(f"File {filename} does not exist")
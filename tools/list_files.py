@@ -3,54 +3,121 @@ Tool per elencare tutti i file nella directory di lavoro.
 Opera solo all'interno della directory base specificata.
 """
 
-import os #non usato direttamente
+import os
+import operator
 from pathlib import Path # pathlib.Path: classe moderna che ho trovato, per gestire percorsi di file in modo + leggibile rispetto a os.path.
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List
+
+from . import _iouring_stat
+
+# Sotto questa soglia il costo di setup del ring supera il risparmio
+_IOURING_MIN_ENTRIES = 256
+
+
+def _file_info(name: str, size: int, mtime: float) -> Dict[str, Any]:
+    """Costruisce il dizionario di metadati di un singolo file."""
+    return {
+        "name": name,
+        "size": size,
+        "modified": mtime,
+        "extension": os.path.splitext(name)[1].lower(),
+        "is_directory": False
+    }
+
+
+def list_files_iter(base_directory: str) -> Iterator[Dict[str, Any]]:
+    """
+    Genera le informazioni sui file uno alla volta, in ordine di directory.
+
+    Memoria O(1): i chiamanti che vogliono solo i primi N risultati (o
+    verificare un'appartenenza) possono interrompere l'iterazione senza
+    materializzare l'intera lista. Solo il fast-path opzionale io_uring
+    (opt-in, directory grandi) materializza le entry per il batch statx.
+
+    Args:
+        base_directory: Percorso alla directory base di lavoro
+
+    Yields:
+        Dizionari con informazioni sui file (nome, dimensione, data modifica)
+    """
+    if _iouring_stat.enabled():
+        yield from _iter_with_batch_statx(base_directory)
+        return
+
+    # os.scandir riusa i metadati restituiti da readdir: una sola syscall
+    # per entry invece di getdents + stat separati, e niente oggetti Path
+    with os.scandir(base_directory) as it:
+        for entry in it:
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except (PermissionError, OSError):
+                # Salta file inaccessibili
+                continue
+            yield _file_info(entry.name, stat.st_size, stat.st_mtime)
+
+
+def _iter_with_batch_statx(base_directory: str) -> Iterator[Dict[str, Any]]:
+    """
+    Variante con statx in batch via io_uring (FILE_AGENT_IOURING=1).
+
+    Deve conoscere tutte le entry prima di sottomettere il batch, quindi
+    materializza la lista: memoria O(N), in cambio di una sola sottomissione
+    al kernel per i metadati sulle directory grandi.
+    """
+    with os.scandir(base_directory) as it:
+        entries = []
+        for entry in it:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    entries.append(entry)
+            except (PermissionError, OSError):
+                # Salta file inaccessibili
+                continue
+
+    batched = None
+    if len(entries) >= _IOURING_MIN_ENTRIES:
+        batched = _iouring_stat.batch_statx(base_directory, [e.name for e in entries])
+
+    for entry in entries:
+        try:
+            if batched is not None and entry.name in batched:
+                size, mtime = batched[entry.name]
+            else:
+                stat = entry.stat(follow_symlinks=False)
+                size, mtime = stat.st_size, stat.st_mtime
+        except (PermissionError, OSError):
+            # Salta file inaccessibili
+            continue
+        yield _file_info(entry.name, size, mtime)
 
 
 def list_files(base_directory: str) -> List[Dict[str, Any]]:
     """
     Lista tutti i file nella directory base con metadati dettagliati.
-    
+
     Args:
         base_directory: Percorso alla directory base di lavoro
-        
+
     Returns:
         Lista di dizionari con informazioni sui file (nome, dimensione, data modifica)
-        
+
     Raises:
         ValueError: Se la directory base non esiste
     """
     try:
         base_path = Path(base_directory)
-        
+
         if not base_path.exists():
             raise ValueError(f"Base directory {base_directory} does not exist")
-            
+
         if not base_path.is_dir():
             raise ValueError(f"{base_directory} is not a directory")
-        
-        files_info = []
-        
-        for file_path in base_path.iterdir():
-            if file_path.is_file():
-                try:
-                    stat = file_path.stat()
-                    files_info.append({
-                        "name": file_path.name,
-                        "size": stat.st_size,
-                        "modified": stat.st_mtime,
-                        "extension": file_path.suffix.lower() if file_path.suffix else "",
-                        "is_directory": False
-                    })
-                except (PermissionError, OSError):
-                    # Salta file inaccessibili
-                    continue
-        
+
         # Ordina i file per nome (in ordine alfabetico)
-        files_info.sort(key=lambda x: x["name"])
-        
-        return files_info
-        
+        return sorted(list_files_iter(base_directory),
+                      key=operator.itemgetter("name"))
+
     except Exception as e:
-        raise Exception(f"Error while listing files: {e}") 
\ No newline at end of file
+        raise Exception(f"Error while listing files: {e}")
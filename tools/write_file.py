@@ -2,9 +2,17 @@
 Tool per scrivere contenuto in un file.
 Opera solo all'interno della directory base specificata.
 """
-from pathlib import Path
+import errno
+import os
 from typing import Literal
 
+from ._paths import ensure_within_base
+
+# Buffer di scrittura tra 64 KiB e 1 MiB: la throughput sequenziale
+# satura ben prima di 1 MiB, sotto i 64 KiB si pagano troppe syscall
+_MIN_WRITE_BUF = 65536
+_MAX_WRITE_BUF = 1 << 20
+
 
 def write_file(filename: str, content: str, base_directory: str, 
                mode: Literal['w', 'a'] = 'w', 
@@ -28,26 +36,45 @@ def write_file(filename: str, content: str, base_directory: str,
         OSError: Se si verifica un errore di I/O
     """
     try:
-        base_path = Path(base_directory)
-        file_path = base_path / filename
-        
         # Verifica che il file sia all'interno della directory base
-        try:
-            file_path.resolve().relative_to(base_path.resolve())
-        except ValueError:
-            raise ValueError(f"File {filename} is not within the base directory")
-            
+        # (la base risolta è in cache: si paga solo la realpath del figlio).
+        # Il percorso resta una stringa: niente oggetti Path nel percorso caldo
+        file_path = ensure_within_base(filename, base_directory)
+
         # Verifica che la directory base esista
-        if not base_path.exists():
+        if not os.path.exists(base_directory):
             raise ValueError(f"Base directory {base_directory} does not exist")
-            
+
         # Crea le sottodirectory se necessario
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
-        # Scrive il file
-        with open(file_path, mode, encoding=encoding) as f:
-            f.write(content) # scrive il contenuto nel file
-            
+        # Append: fd diretto con O_APPEND (scrittura atomica garantita dal
+        # kernel) e un solo encode bulk, senza allocare TextIOWrapper +
+        # encoder + buffered writer per appendere una riga di log.
+        # Solo dove la modalità testo non tradurrebbe i newline.
+        if mode == 'a' and os.linesep == '\n':
+            fd = os.open(file_path,
+                         os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC,
+                         0o644)
+            try:
+                os.write(fd, content.encode(encoding))
+            finally:
+                os.close(fd)
+            return True
+
+        # Scrive il file con buffer dimensionato sul contenuto
+        buf_size = max(_MIN_WRITE_BUF, min(_MAX_WRITE_BUF, len(content)))
+        if (content.isascii() and os.linesep == '\n'
+                and encoding.lower() in ('utf-8', 'utf8', 'ascii')):
+            # Fast path binario per contenuto ASCII: un solo encode bulk
+            # invece dell'encoder incrementale di TextIOWrapper; sicuro solo
+            # dove la modalità testo non tradurrebbe i newline
+            with open(file_path, mode + 'b', buffering=buf_size) as f:
+                f.write(content.encode('ascii'))
+        else:
+            with open(file_path, mode, encoding=encoding, buffering=buf_size) as f:
+                f.write(content) # scrive il contenuto nel file
+
         return True # ritorna True se l'operazione ha successo
         
     except PermissionError as e:
@@ -55,4 +82,77 @@ def write_file(filename: str, content: str, base_directory: str,
     except OSError as e:
         raise OSError(f"I/O error while writing file {filename}: {e}")
     except Exception as e:
-        raise Exception(f"Error while writing file {filename}: {e}") 
\ No newline at end of file
+        raise Exception(f"Error while writing file {filename}: {e}")
+
+
+def write_file_from(filename: str, src_fd: int, size: int, base_directory: str) -> bool:
+    """
+    Scrive un file copiando `size` byte da un file descriptor sorgente.
+
+    La copia avviene interamente nel kernel (copy_file_range, con fallback
+    sendfile): nessun passaggio dei dati in userspace né encode, il guadagno
+    maggiore per blob grandi già presenti su disco.
+
+    Args:
+        filename: Nome del file di destinazione
+        src_fd: File descriptor sorgente, posizionato all'inizio dei dati
+        size: Numero di byte da copiare
+        base_directory: Percorso alla directory base di lavoro
+
+    Returns:
+        True se l'operazione ha successo
+
+    Raises:
+        ValueError: Se il percorso del file non è valido
+        PermissionError: Se non si hanno permessi per scrivere il file
+        OSError: Se si verifica un errore di I/O
+    """
+    try:
+        file_path = ensure_within_base(filename, base_directory)
+
+        if not os.path.exists(base_directory):
+            raise ValueError(f"Base directory {base_directory} does not exist")
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        dst_fd = os.open(file_path,
+                         os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC,
+                         0o644)
+        try:
+            _kernel_copy(src_fd, dst_fd, size)
+        finally:
+            os.close(dst_fd)
+
+        return True
+
+    except PermissionError as e:
+        raise PermissionError(f"Insufficient permissions to write {filename}: {e}")
+    except OSError as e:
+        raise OSError(f"I/O error while writing file {filename}: {e}")
+    except Exception as e:
+        raise Exception(f"Error while writing file {filename}: {e}")
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, remaining: int) -> None:
+    """Copia `remaining` byte tra due fd senza buffer in userspace."""
+    if hasattr(os, 'copy_file_range'):
+        copied_any = False
+        try:
+            while remaining > 0:
+                n = os.copy_file_range(src_fd, dst_fd, remaining)
+                if n == 0:
+                    return
+                copied_any = True
+                remaining -= n
+            return
+        except OSError as e:
+            # Filesystem/kernel senza supporto: si passa a sendfile, ma solo
+            # se nessun byte è ancora stato copiato
+            if copied_any or e.errno not in (errno.EINVAL, errno.EXDEV, errno.ENOSYS):
+                raise
+
+    while remaining > 0:
+        n = os.sendfile(dst_fd, src_fd, None, remaining)
+        if n == 0:
+            return
+        remaining -= n